@@ -0,0 +1,97 @@
+import numpy as np
+import glob
+import os
+
+# One record per bus. Buses still queued or in service when the trace is
+# closed are recorded too, with NaN for the times that had not happened yet.
+TRACE_DTYPE = np.dtype([
+    ('arrival', 'f8'),
+    ('inspection_start', 'f8'),
+    ('inspection_end', 'f8'),
+    ('repair', '?'),
+    ('repair_start', 'f8'),
+    ('repair_end', 'f8'),
+    ('station', 'i1'),  # -1 when the bus was not repaired
+])
+
+CHUNK_SIZE = 4096  # records kept in memory before a shard is written
+
+class TraceWriter:
+    # Append-only writer: records are buffered in a fixed-size structured
+    # array and flushed as numbered .npy shards inside trace_dir.
+
+    def __init__(self, trace_dir, chunk_size=CHUNK_SIZE):
+        self.trace_dir = trace_dir
+        self.chunk_size = chunk_size
+        self.buffer = np.empty(chunk_size, dtype=TRACE_DTYPE)
+        self.count = 0
+        self.in_flight = {}
+        os.makedirs(trace_dir, exist_ok=True)
+        self.shard = len(glob.glob(os.path.join(trace_dir, "shard_*.npy")))
+
+    def update(self, bus, **fields):
+        # Fill in the fields of a bus still in the depot as they happen
+        self.in_flight.setdefault(bus, {}).update(fields)
+
+    def depart(self, bus):
+        self.record(**self.in_flight.pop(bus))
+
+    def record(self, arrival, inspection_start=np.nan, inspection_end=np.nan,
+               repair=False, repair_start=np.nan, repair_end=np.nan, station=-1):
+        self.buffer[self.count] = (arrival, inspection_start, inspection_end,
+                                   repair, repair_start, repair_end, station)
+        self.count += 1
+        if self.count == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.count == 0:
+            return
+        shard_file = os.path.join(self.trace_dir, f"shard_{self.shard:06d}.npy")
+        np.save(shard_file, self.buffer[:self.count])
+        self.shard += 1
+        self.count = 0
+
+    def close(self):
+        for bus in list(self.in_flight):
+            self.depart(bus)
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_trace(trace_dir):
+    # Memory-mapped view of every shard, in write order
+    shard_files = sorted(glob.glob(os.path.join(trace_dir, "shard_*.npy")))
+    return [np.load(f, mmap_mode='r') for f in shard_files]
+
+def load_trace(trace_dir):
+    # Single in-memory array with all the records
+    shards = read_trace(trace_dir)
+    if not shards:
+        return np.empty(0, dtype=TRACE_DTYPE)
+    return np.concatenate(shards)
+
+# Waits of buses that were still queued when the run ended come out as NaN
+
+def inspection_waits(trace):
+    return trace['inspection_start'] - trace['arrival']
+
+def repair_waits(trace):
+    repaired = trace[trace['repair']]
+    return repaired['repair_start'] - repaired['inspection_end']
+
+def waits_by_hour(trace, period=24):
+    # Mean inspection wait grouped by arrival hour of the day, leaving out
+    # buses still queued when the run ended
+    waits = inspection_waits(trace)
+    trace = trace[~np.isnan(waits)]
+    waits = waits[~np.isnan(waits)]
+    hours = (trace['arrival'] % period).astype(int)
+    totals = np.bincount(hours, weights=waits, minlength=period)
+    counts = np.bincount(hours, minlength=period)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return totals / counts
@@ -0,0 +1,102 @@
+import numpy as np
+
+# Metrics returned by simulate_interarrival() that the surrogate predicts
+METRICS = (
+    'utilization_inspection',
+    'utilization_repair',
+    'inspection_queue_length',
+    'repair_queue_length',
+    'inspection_queue_delay',
+    'repair_queue_delay',
+)
+
+class Surrogate:
+    # Polynomial least squares fit of every metric against the arrival rate
+    # (1 / interarrival). Only the normal equations are kept, so adding a
+    # run is a rank-one update and refitting is a small solve.
+
+    def __init__(self, degree=3, ridge=1e-8):
+        self.degree = degree
+        self.ridge = ridge
+        self.xtx = np.zeros((degree + 1, degree + 1))
+        self.xty = np.zeros((degree + 1, len(METRICS)))
+        self.n = 0
+        self.coef = None
+
+    def features(self, interarrival):
+        rate = 1.0 / np.atleast_1d(np.asarray(interarrival, dtype=float))
+        return np.vander(rate, self.degree + 1, increasing=True)
+
+    def add(self, interarrival, result):
+        phi = self.features(interarrival)[0]
+        y = np.array([result[k] for k in METRICS])
+        self.xtx += np.outer(phi, phi)
+        self.xty += np.outer(phi, y)
+        self.n += 1
+        # With fewer runs than coefficients lstsq gives the minimum-norm fit
+        a = self.xtx + self.ridge * np.eye(self.degree + 1)
+        self.coef = np.linalg.lstsq(a, self.xty, rcond=None)[0]
+
+    def predict(self, interarrival):
+        # One dict of predicted metrics per interarrival time
+        values = self.features(interarrival) @ self.coef
+        return [dict(zip(METRICS, row), interarrival=x)
+                for x, row in zip(np.atleast_1d(interarrival), values)]
+
+def surrogate_errors(predicted, simulated):
+    # Mean absolute error per metric between surrogate and full model
+    if not predicted:
+        return {}
+    return {k: float(np.mean([abs(p[k] - s[k]) for p, s in zip(predicted, simulated)]))
+            for k in METRICS}
+
+def metamodel_sweep(run, criticality, start=2.0, stop=0.5, step=0.1, n_seed=4, degree=3, margin=0.5):
+    # Same grid and order as the plain sweep: start, start - step, ... while
+    # > stop, stopping at the first critical point. criticality(result) is how
+    # close a run is to the stability limits, above 1 meaning critical. A few
+    # seed runs fit the surrogate; after that a grid point is only simulated
+    # if the surrogate predicts it at 1 - margin or above, and skipped as
+    # clearly stable otherwise. The fit is updated after every run.
+    # Near the boundary single runs scatter far around the trend (one point
+    # at 1.4 between neighbours at 0.77), so the margin has to cover that
+    # scatter for the sweep to find the same point as the plain one.
+    grid = []
+    interarrival = start
+    while interarrival > stop:
+        grid.append(interarrival)
+        interarrival -= step
+
+    surrogate = Surrogate(degree)
+    simulated = {}
+    predicted_before, simulated_after = [], []
+
+    def simulate(i):
+        # Score the surrogate on every run it could already predict
+        prediction = surrogate.predict(grid[i])[0] if surrogate.n > surrogate.degree else None
+        result = run(grid[i])
+        if prediction is not None:
+            predicted_before.append(prediction)
+            simulated_after.append(result)
+        simulated[i] = result
+        surrogate.add(grid[i], result)
+
+    for i in sorted(set(np.linspace(0, len(grid) - 1, min(n_seed, len(grid))).round().astype(int))):
+        simulate(int(i))
+
+    critical = None
+    for i in range(len(grid)):
+        if i not in simulated:
+            if criticality(surrogate.predict(grid[i])[0]) < 1 - margin:
+                continue
+            simulate(i)
+        if criticality(simulated[i]) > 1:
+            critical = i
+            break
+
+    return {
+        'grid': grid,
+        'simulated': [simulated[i] for i in sorted(simulated)],
+        'critical_interarrival': grid[critical] if critical is not None else None,
+        'runs': len(simulated),
+        'errors': surrogate_errors(predicted_before, simulated_after),
+    }
@@ -1,6 +1,8 @@
 import simpy
 import random
 import statistics
+import argparse
+from bus_trace import TraceWriter
 
 # Constants
 SIM_TIME = 160  # hours
@@ -22,10 +24,18 @@ repair_busy_time = 0.0
 repair_busy_start = [0.0, 0.0]
 repair_station_busy = [False, False]
 
+# Optional per-bus trace (see bus_trace.py)
+trace_writer = None
+
+def trace(name, **fields):
+    if trace_writer is not None:
+        trace_writer.update(name, **fields)
+
 def bus_process(env, name, inspection_station, repair_station):
     global inspection_utilization_time, repair_busy_time
     
     arrival_time = env.now
+    trace(name, arrival=arrival_time)
     
     # ----- Inspection -----
     with inspection_station.request() as request:
@@ -33,18 +43,22 @@ def bus_process(env, name, inspection_station, repair_station):
         yield request
         wait = env.now - queue_start
         inspection_wait_times.append(wait)
+        trace(name, inspection_start=env.now)
 
         service_time = random.uniform(INSPECTION_TIME_MIN, INSPECTION_TIME_MAX)
         inspection_utilization_time += service_time
         yield env.timeout(service_time)
+        trace(name, inspection_end=env.now)
 
     # ----- Possible Repair -----
     if random.random() < REPAIR_PROBABILITY:
+        trace(name, repair=True)
         with repair_station.request() as request:
             queue_start = env.now
             yield request
             wait = env.now - queue_start
             repair_wait_times.append(wait)
+            repair_start = env.now
 
             # Find a free station and record busy time
             for i in range(NUM_REPAIR_STATIONS):
@@ -53,6 +67,7 @@ def bus_process(env, name, inspection_station, repair_station):
                     repair_busy_start[i] = env.now
                     repair_station_index = i
                     break
+            trace(name, repair_start=repair_start, station=repair_station_index)
 
             service_time = random.uniform(REPAIR_TIME_MIN, REPAIR_TIME_MAX)
             yield env.timeout(service_time)
@@ -61,6 +76,10 @@ def bus_process(env, name, inspection_station, repair_station):
             if repair_station_busy[repair_station_index]:
                 repair_busy_time += env.now - repair_busy_start[repair_station_index]
                 repair_station_busy[repair_station_index] = False
+        trace(name, repair_end=env.now)
+
+    if trace_writer is not None:
+        trace_writer.depart(name)
 
 def bus_arrival(env, inspection_station, repair_station):
     i = 0
@@ -83,6 +102,15 @@ def format_time(hours_float):
     return f"{h:02d}:{m:02d}:{s:02d}"
 
 def main():
+    global trace_writer
+
+    parser = argparse.ArgumentParser(description="Bus maintenance depot simulation.")
+    parser.add_argument("--trace", type=str, help="Directory to record a per-bus binary trace")
+    args = parser.parse_args()
+
+    if args.trace:
+        trace_writer = TraceWriter(args.trace)
+
     random.seed(42)
     env = simpy.Environment()
     inspection_station = simpy.Resource(env, capacity=1)
@@ -91,7 +119,11 @@ def main():
     env.process(bus_arrival(env, inspection_station, repair_station))
     env.process(monitor_queues(env, inspection_station, repair_station))
 
-    env.run(until=SIM_TIME)
+    try:
+        env.run(until=SIM_TIME)
+    finally:
+        if trace_writer is not None:
+            trace_writer.close()
 
     # ---- Results ----
     print("Simulation Results (160 hours):")
@@ -1,6 +1,10 @@
 import simpy
 import random
 import statistics
+import argparse
+import os
+from bus_trace import TraceWriter
+from metamodel import metamodel_sweep
 
 # Constants
 SIM_TIME = 160  # hours
@@ -22,10 +26,18 @@ repair_busy_time = 0.0
 repair_busy_start = [0.0, 0.0]
 repair_station_busy = [False, False]
 
+# Optional per-bus trace (see bus_trace.py)
+trace_writer = None
+
+def trace(name, **fields):
+    if trace_writer is not None:
+        trace_writer.update(name, **fields)
+
 def bus_process(env, name, inspection_station, repair_station):
     global inspection_utilization_time, repair_busy_time
     
     arrival_time = env.now
+    trace(name, arrival=arrival_time)
     
     # ----- Inspection -----
     with inspection_station.request() as request:
@@ -33,18 +45,22 @@ def bus_process(env, name, inspection_station, repair_station):
         yield request
         wait = env.now - queue_start
         inspection_wait_times.append(wait)
+        trace(name, inspection_start=env.now)
 
         service_time = random.uniform(INSPECTION_TIME_MIN, INSPECTION_TIME_MAX)
         inspection_utilization_time += service_time
         yield env.timeout(service_time)
+        trace(name, inspection_end=env.now)
 
     # ----- Possible Repair -----
     if random.random() < REPAIR_PROBABILITY:
+        trace(name, repair=True)
         with repair_station.request() as request:
             queue_start = env.now
             yield request
             wait = env.now - queue_start
             repair_wait_times.append(wait)
+            repair_start = env.now
 
             # Find a free station and record busy time
             for i in range(NUM_REPAIR_STATIONS):
@@ -53,6 +69,7 @@ def bus_process(env, name, inspection_station, repair_station):
                     repair_busy_start[i] = env.now
                     repair_station_index = i
                     break
+            trace(name, repair_start=repair_start, station=repair_station_index)
 
             service_time = random.uniform(REPAIR_TIME_MIN, REPAIR_TIME_MAX)
             yield env.timeout(service_time)
@@ -61,6 +78,10 @@ def bus_process(env, name, inspection_station, repair_station):
             if repair_station_busy[repair_station_index]:
                 repair_busy_time += env.now - repair_busy_start[repair_station_index]
                 repair_station_busy[repair_station_index] = False
+        trace(name, repair_end=env.now)
+
+    if trace_writer is not None:
+        trace_writer.depart(name)
 
 def bus_arrival(env, inspection_station, repair_station, mean_interarrival):
     i = 0
@@ -75,8 +96,8 @@ def monitor_queues(env, inspection_station, repair_station):
         repair_queue_lengths.append(len(repair_station.queue))
         yield env.timeout(0.5)  # check every 30 minutes
 
-def run_simulation(mean_interarrival):
-    random.seed(42)
+def run_simulation(mean_interarrival, seed=42):
+    random.seed(seed)
     env = simpy.Environment()
     inspection_station = simpy.Resource(env, capacity=1)
     repair_station = simpy.Resource(env, capacity=NUM_REPAIR_STATIONS)
@@ -85,6 +106,64 @@ def run_simulation(mean_interarrival):
     env.process(monitor_queues(env, inspection_station, repair_station))
     env.run(until=SIM_TIME)
 
+def simulate_interarrival(mean_interarrival, trace_dir=None, seed=42):
+    global inspection_wait_times, repair_wait_times, inspection_queue_lengths, repair_queue_lengths
+    global inspection_utilization_time, repair_busy_time, repair_busy_start, repair_station_busy
+    global trace_writer
+
+    # Reset metrics for this simulation run
+    inspection_wait_times = []
+    repair_wait_times = []
+    inspection_queue_lengths = []
+    repair_queue_lengths = []
+    inspection_utilization_time = 0.0
+    repair_busy_time = 0.0
+    repair_busy_start = [0.0, 0.0]
+    repair_station_busy = [False, False]
+
+    trace_writer = TraceWriter(trace_dir) if trace_dir else None
+
+    try:
+        run_simulation(mean_interarrival, seed)
+    finally:
+        if trace_writer is not None:
+            trace_writer.close()
+            trace_writer = None
+
+    inspection_queue_delay = statistics.mean(inspection_wait_times) if inspection_wait_times else 0
+    repair_queue_delay = statistics.mean(repair_wait_times) if repair_wait_times else 0
+
+    inspection_queue_length = statistics.mean(inspection_queue_lengths)
+    repair_queue_length = statistics.mean(repair_queue_lengths)
+
+    utilization_inspection = inspection_utilization_time / SIM_TIME
+    utilization_repair = (repair_busy_time / SIM_TIME) / NUM_REPAIR_STATIONS
+
+    return {
+        'interarrival': mean_interarrival,
+        'utilization_inspection': utilization_inspection,
+        'utilization_repair': utilization_repair,
+        'inspection_queue_length': inspection_queue_length,
+        'repair_queue_length': repair_queue_length,
+        'inspection_queue_delay': inspection_queue_delay,
+        'repair_queue_delay': repair_queue_delay
+    }
+
+# Stability limits: a run is critical as soon as any metric goes over its limit
+LIMITS = {
+    'utilization_inspection': 0.90,
+    'utilization_repair': 0.85,
+    'inspection_queue_length': 6.0,
+    'inspection_queue_delay': 1.0,
+}
+
+def criticality(result):
+    # Largest metric-to-limit ratio; above 1 means critical
+    return max(result[k] / limit for k, limit in LIMITS.items())
+
+def is_critical(result):
+    return criticality(result) > 1
+
 def format_time(hours_float):
     total_seconds = int(hours_float * 3600)
     h = total_seconds // 3600
@@ -93,9 +172,13 @@ def format_time(hours_float):
     return f"{h:02d}:{m:02d}:{s:02d}"
 
 def main():
-    global inspection_wait_times, repair_wait_times, inspection_queue_lengths, repair_queue_lengths
-    global inspection_utilization_time, repair_busy_time, repair_busy_start, repair_station_busy
-    
+    parser = argparse.ArgumentParser(description="Bus maintenance depot simulation, interarrival sweep.")
+    parser.add_argument("--trace", type=str, help="Directory to record a per-bus binary trace for each run")
+    parser.add_argument("--metamodel", action="store_true", help="Pre-screen the sweep with a surrogate model and only simulate near the stability boundary")
+    parser.add_argument("--step", type=float, default=0.1, help="Interarrival step of the sweep in hours (default: 0.1)")
+    args = parser.parse_args()
+    if args.step <= 0:
+        parser.error("--step must be positive")
     
     # ---------------------------------------------Ex 1.2---------------------------------------------
         
@@ -103,66 +186,63 @@ def main():
     
     MEAN_INTERARRIVAL = 2.0
     MIN_INTERARRIVAL = 0.5
-    step = 0.1
+    step = args.step
     critical_interarrival = None
-    
-    while MEAN_INTERARRIVAL > MIN_INTERARRIVAL:
-        # Reset metrics for this simulation run
-
-        inspection_wait_times = []
-        repair_wait_times = []
-        inspection_queue_lengths = []
-        repair_queue_lengths = []
-        inspection_utilization_time = 0.0
-        repair_busy_time = 0.0
-        repair_busy_start = [0.0, 0.0]
-        repair_station_busy = [False, False]
-
-        run_simulation(MEAN_INTERARRIVAL)
-        
-        inspection_queue_delay = statistics.mean(inspection_wait_times) if inspection_wait_times else 0
-        repair_queue_delay = statistics.mean(repair_wait_times) if repair_wait_times else 0
-        
-        inspection_queue_length = statistics.mean(inspection_queue_lengths)
-        repair_queue_length = statistics.mean(repair_queue_lengths)
-        
-        utilization_inspection = inspection_utilization_time / SIM_TIME
-        utilization_repair = (repair_busy_time / SIM_TIME) / NUM_REPAIR_STATIONS
-        
-        result = {
-            'interarrival': MEAN_INTERARRIVAL,
-            'utilization_inspection': utilization_inspection,
-            'utilization_repair': utilization_repair,
-            'inspection_queue_length': inspection_queue_length,
-            'repair_queue_length': repair_queue_length,
-            'inspection_queue_delay': inspection_queue_delay,
-            'repair_queue_delay': repair_queue_delay
-        }
-        interarrival_results.append(result)
+
+    if args.metamodel:
+        def run(mean_interarrival):
+            trace_dir = None
+            if args.trace:
+                trace_dir = os.path.join(args.trace, f"interarrival_{mean_interarrival:g}")
+            result = simulate_interarrival(mean_interarrival, trace_dir)
+            print(f"\nSimulated mean interarrival time {mean_interarrival:.2f} hours: "
+                  f"inspection utilization {result['utilization_inspection'] * 100:.2f}%, "
+                  f"inspection delay {format_time(result['inspection_queue_delay'])} (hh:mm:ss)")
+            return result
+
+        sweep = metamodel_sweep(run, criticality, MEAN_INTERARRIVAL, MIN_INTERARRIVAL, step)
+        critical_interarrival = sweep['critical_interarrival']
+
+        print(f"\nSimulations run: {sweep['runs']} of {len(sweep['grid'])} grid points")
+        print("Surrogate mean absolute error on the runs it predicted:")
+        for metric, error in sweep['errors'].items():
+            print(f"  {metric}: {error:.4f}")
+    else:
+        while MEAN_INTERARRIVAL > MIN_INTERARRIVAL:
+            # One trace subdirectory per interarrival time
+            trace_dir = None
+            if args.trace:
+                trace_dir = os.path.join(args.trace, f"interarrival_{MEAN_INTERARRIVAL:g}")
+
+            result = simulate_interarrival(MEAN_INTERARRIVAL, trace_dir)
+
+            inspection_queue_delay = result['inspection_queue_delay']
+            repair_queue_delay = result['repair_queue_delay']
+            inspection_queue_length = result['inspection_queue_length']
+            repair_queue_length = result['repair_queue_length']
+            utilization_inspection = result['utilization_inspection']
+            utilization_repair = result['utilization_repair']
+            interarrival_results.append(result)
         
-        # ---- Results ----
-        print(f"\nMean Interarrival Time: {MEAN_INTERARRIVAL:.2f} hours")
-        print(f"Average delay in inspection queue: {format_time(inspection_queue_delay)} (hh:mm:ss)")
-
-        if repair_wait_times:
-            print(f"Average delay in repair queue: {format_time(repair_queue_delay)} (hh:mm:ss)")
-        else:
-            print("No buses required repair.")
-        print(f"Average inspection queue length: {inspection_queue_length:.2f} buses")
-        print(f"Average repair queue length: {repair_queue_length:.2f} buses")
-        print(f"Utilization of inspection station: {utilization_inspection * 100:.2f}%")
-        print(f"Utilization of repair stations: {utilization_repair * 100:.2f}%")
+            # ---- Results ----
+            print(f"\nMean Interarrival Time: {MEAN_INTERARRIVAL:.2f} hours")
+            print(f"Average delay in inspection queue: {format_time(inspection_queue_delay)} (hh:mm:ss)")
+
+            if repair_wait_times:
+                print(f"Average delay in repair queue: {format_time(repair_queue_delay)} (hh:mm:ss)")
+            else:
+                print("No buses required repair.")
+            print(f"Average inspection queue length: {inspection_queue_length:.2f} buses")
+            print(f"Average repair queue length: {repair_queue_length:.2f} buses")
+            print(f"Utilization of inspection station: {utilization_inspection * 100:.2f}%")
+            print(f"Utilization of repair stations: {utilization_repair * 100:.2f}%")
     
-        if (utilization_inspection > 0.90 
-            or utilization_repair > 0.85 
-            or inspection_queue_length > 6.0 
-            or inspection_queue_delay > 1.0
-            or (len(interarrival_results) > 0 and inspection_queue_delay - interarrival_results[-1]['inspection_queue_delay'] > 0.5)):
-            critical_interarrival = MEAN_INTERARRIVAL
-            break
+            if is_critical(result):
+                critical_interarrival = MEAN_INTERARRIVAL
+                break
 
             
-        MEAN_INTERARRIVAL -= step
+            MEAN_INTERARRIVAL -= step
 
     # Print the final result
     print("\nSimulation Results for Exercise 1.2 (160 hours):")
@@ -5,7 +5,7 @@ import json
 import sys
 import os
 
-def simulate_euler(params):
+def simulate_euler(params, out=None):
     # Unpack parameters
     x = params['x0']
     z = params['z0']
@@ -21,11 +21,15 @@ def simulate_euler(params):
     x_vals, z_vals = [], []
     vx_vals, vz_vals = [], []
 
-    for _ in time:
-        x_vals.append(x)
-        z_vals.append(z)
-        vx_vals.append(vx)
-        vz_vals.append(vz)
+    for i in range(len(time)):
+        # Write straight into a preallocated (n_steps, 4) array if given
+        if out is not None:
+            out[i] = (x, z, vx, vz)
+        else:
+            x_vals.append(x)
+            z_vals.append(z)
+            vx_vals.append(vx)
+            vz_vals.append(vz)
 
         ax = -u/m * vx**2 * np.sign(vx)
         az = -g - u/m * vz**2 * np.sign(vz)
@@ -35,6 +39,8 @@ def simulate_euler(params):
         x += dt * vx
         z += dt * vz
 
+    if out is not None:
+        return time, out[:, 0], out[:, 1], out[:, 2], out[:, 3]
     return time, x_vals, z_vals, vx_vals, vz_vals
 
 def axaz(u, g, m, vx, vz):
@@ -43,7 +49,7 @@ def axaz(u, g, m, vx, vz):
     az = -g - u/m * vz**2 * np.sign(vz)  
     return ax, az
 
-def simulate_runge_kutta(params):
+def simulate_runge_kutta(params, out=None):
     # Unpack parameters
     x = params['x0']
     z = params['z0']
@@ -59,11 +65,15 @@ def simulate_runge_kutta(params):
     x_vals, z_vals = [], []
     vx_vals, vz_vals = [], []
 
-    for _ in time:
-        x_vals.append(x)
-        z_vals.append(z)
-        vx_vals.append(vx)
-        vz_vals.append(vz)
+    for i in range(len(time)):
+        # Write straight into a preallocated (n_steps, 4) array if given
+        if out is not None:
+            out[i] = (x, z, vx, vz)
+        else:
+            x_vals.append(x)
+            z_vals.append(z)
+            vx_vals.append(vx)
+            vz_vals.append(vz)
 
         ax1, az1 = axaz(u, g, m, vx, vz)
         vx1, vz1 = vx, vz
@@ -89,6 +99,8 @@ def simulate_runge_kutta(params):
         z += (dt/6) * (vz1 + 2*vz2 + 2*vz3 + vz4)
 
 
+    if out is not None:
+        return time, out[:, 0], out[:, 1], out[:, 2], out[:, 3]
     return time, x_vals, z_vals, vx_vals, vz_vals
 
 def main():
@@ -0,0 +1,116 @@
+import numpy as np
+import argparse
+import json
+import sys
+import os
+
+from simulation2_3 import simulate_euler, simulate_runge_kutta
+
+COLUMNS = ('x', 'z', 'vx', 'vz')
+DATA_FILE = "trajectories.npy"
+META_FILE = "metadata.json"
+
+METHODS = {
+    'euler': simulate_euler,
+    'rk4': simulate_runge_kutta,
+}
+
+def num_steps(params):
+    # Same time grid the integrators use
+    return len(np.arange(0, params['t_final'], params['dt']))
+
+class TrajectoryStore:
+    # Ensemble of trajectories kept on disk in a single (n_cases, max_steps, 4)
+    # .npy file, accessed through numpy.memmap. The params of every case and
+    # its number of steps are kept in a JSON file next to it.
+
+    def __init__(self, store_dir, data, metadata):
+        self.store_dir = store_dir
+        self.data = data
+        self.metadata = metadata
+        self.cases = metadata['cases']
+        self.steps = metadata['steps']
+
+    @classmethod
+    def create(cls, store_dir, cases, method=None, dtype='f8'):
+        os.makedirs(store_dir, exist_ok=True)
+        steps = [num_steps(p) for p in cases]
+        shape = (len(cases), max(steps, default=0), len(COLUMNS))
+        data = np.lib.format.open_memmap(os.path.join(store_dir, DATA_FILE),
+                                         mode='w+', dtype=dtype, shape=shape)
+        metadata = {
+            'method': method,
+            'columns': list(COLUMNS),
+            'cases': cases,
+            'steps': steps,
+        }
+        with open(os.path.join(store_dir, META_FILE), 'w') as f:
+            json.dump(metadata, f, indent=4)
+        return cls(store_dir, data, metadata)
+
+    @classmethod
+    def open(cls, store_dir, mode='r'):
+        with open(os.path.join(store_dir, META_FILE), 'r') as f:
+            metadata = json.load(f)
+        data = np.load(os.path.join(store_dir, DATA_FILE), mmap_mode=mode)
+        return cls(store_dir, data, metadata)
+
+    def __len__(self):
+        return len(self.cases)
+
+    def trajectory(self, i):
+        # View of case i, writable when the store was created or opened with 'r+'
+        return self.data[i, :self.steps[i]]
+
+    def column(self, i, name):
+        return self.data[i, :self.steps[i], COLUMNS.index(name)]
+
+    def time(self, i):
+        params = self.cases[i]
+        return np.arange(0, params['t_final'], params['dt'])
+
+    def window(self, i, t_start, t_end):
+        # Rows of case i with t_start <= t < t_end, as a view
+        start, end = np.searchsorted(self.time(i), [t_start, t_end])
+        return self.data[i, start:max(start, end)]
+
+    def flush(self):
+        if isinstance(self.data, np.memmap):
+            self.data.flush()
+
+def run_ensemble(store_dir, cases, method):
+    simulate = METHODS[method]
+    store = TrajectoryStore.create(store_dir, cases, method)
+    for i, params in enumerate(cases):
+        simulate(params, out=store.trajectory(i))
+    store.flush()
+    return store
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an ensemble of projectile simulations into a memory-mapped store.")
+    parser.add_argument("--param_file", type=str, required=True, help="Path to JSON file with a list of parameter sets")
+    parser.add_argument("--method", choices=sorted(METHODS), default='rk4', help="Integration method (default: rk4)")
+    parser.add_argument("--store", type=str, required=True, help="Directory for the trajectory store")
+
+    args = parser.parse_args()
+
+    try:
+        with open(args.param_file, 'r') as f:
+            cases = json.load(f)
+    except Exception as e:
+        print("Failed to read parameter file:", e)
+        sys.exit(1)
+
+    # A single parameter set is an ensemble of one
+    if isinstance(cases, dict):
+        cases = [cases]
+    for params in cases:
+        params.setdefault('g', 9.81)
+
+    store = run_ensemble(args.store, cases, args.method)
+
+    print(f"Stored {len(store)} trajectories ({args.method}) in {args.store}")
+    print(f"Data shape: {store.data.shape}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import asyncio
+import argparse
+import json
+import sys
+import os
+import stat
+import signal
+from concurrent.futures import ProcessPoolExecutor
+
+# The simulation scripts live in their exercise folders and import their
+# neighbours by name, so both folders go on the path.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, "exercise1"))
+sys.path.insert(0, os.path.join(BASE_DIR, "exercise2"))
+
+# Imported once here so every pool process starts with simpy, numpy and
+# matplotlib already loaded
+import simulation1_2
+import simulation2_3
+
+PROJECTILE_METHODS = {
+    'euler': simulation2_3.simulate_euler,
+    'rk4': simulation2_3.simulate_runge_kutta,
+}
+
+def run_depot(job):
+    return simulation1_2.simulate_interarrival(
+        job.get('mean_interarrival', 2.0),
+        job.get('trace'),
+        job.get('seed', 42),
+    )
+
+def run_projectile(job):
+    params = dict(job['params'])
+    params.setdefault('g', 9.81)
+    method = job.get('method', 'rk4')
+    if method not in PROJECTILE_METHODS:
+        raise ValueError(f"Unknown method: {method}")
+
+    time, x_vals, z_vals, vx_vals, vz_vals = PROJECTILE_METHODS[method](params)
+
+    result = {
+        'method': method,
+        'final_x': float(x_vals[-1]),
+        'final_z': float(z_vals[-1]),
+        'final_vx': float(vx_vals[-1]),
+        'final_vz': float(vz_vals[-1]),
+        'max_height': float(max(z_vals)),
+    }
+    if job.get('series'):
+        result['time'] = time.tolist()
+        result['x'] = [float(v) for v in x_vals]
+        result['z'] = [float(v) for v in z_vals]
+        result['vx'] = [float(v) for v in vx_vals]
+        result['vz'] = [float(v) for v in vz_vals]
+    return result
+
+JOBS = {
+    'depot': run_depot,
+    'projectile': run_projectile,
+}
+
+def warm_up(_):
+    return os.getpid()
+
+def run_job(job):
+    # Runs inside a pool process
+    kind = job.get('job')
+    if kind not in JOBS:
+        raise ValueError(f"Unknown job type: {kind}")
+    return JOBS[kind](job)
+
+async def handle_line(loop, pool, line, write):
+    job_id = None
+    try:
+        job = json.loads(line)
+        job_id = job.get('id')
+        result = await loop.run_in_executor(pool, run_job, job)
+        response = {'id': job_id, 'ok': True, 'result': result}
+    except Exception as e:
+        response = {'id': job_id, 'ok': False, 'error': str(e)}
+    await write(json.dumps(response) + "\n")
+
+async def serve_stream(loop, pool, readline, write):
+    # One JSON job per line; responses are written as jobs finish, so they
+    # may come back out of order and must be matched by "id"
+    tasks = set()
+    try:
+        while True:
+            line = await readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            task = asyncio.ensure_future(handle_line(loop, pool, line, write))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+    finally:
+        # Only left over if reading failed; nobody is there for the replies
+        for task in tasks:
+            task.cancel()
+
+async def serve_stdin(loop, pool):
+    if stat.S_ISREG(os.fstat(sys.stdin.fileno()).st_mode):
+        # Pipe transports refuse regular files (worker.py < jobs.jsonl), so
+        # read those from a thread instead
+        async def readline():
+            return await loop.run_in_executor(None, sys.stdin.buffer.readline)
+    else:
+        reader = asyncio.StreamReader(limit=2**24)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        readline = reader.readline
+
+    async def write(text):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    await serve_stream(loop, pool, readline, write)
+
+async def serve_socket(loop, pool, path):
+    async def on_connect(reader, writer):
+        lock = asyncio.Lock()
+
+        async def write(text):
+            async with lock:
+                try:
+                    writer.write(text.encode())
+                    await writer.drain()
+                except ConnectionError:
+                    # The client went away before its reply was ready
+                    pass
+
+        try:
+            await serve_stream(loop, pool, reader.readline, write)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    if os.path.exists(path):
+        os.remove(path)
+    server = await asyncio.start_unix_server(on_connect, path=path, limit=2**24)
+    print(f"Worker listening on {path}", file=sys.stderr)
+
+    # Serve until SIGTERM; Ctrl-C is handled in main()
+    stop = loop.create_future()
+    loop.add_signal_handler(signal.SIGTERM, stop.set_result, None)
+    try:
+        async with server:
+            await stop
+    finally:
+        loop.remove_signal_handler(signal.SIGTERM)
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-lived worker that runs depot and projectile simulations from JSON-lines jobs.")
+    parser.add_argument("--socket", type=str, help="Unix socket path to listen on (default: read jobs from stdin)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes (default: CPU count)")
+
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        # Fork the pool before the event loop starts serving; forking it lazily
+        # from inside a request handler can leave jobs stuck in the call queue
+        list(pool.map(warm_up, range(args.workers)))
+        try:
+            if args.socket:
+                loop.run_until_complete(serve_socket(loop, pool, args.socket))
+            else:
+                loop.run_until_complete(serve_stdin(loop, pool))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            loop.close()
+            if args.socket and os.path.exists(args.socket):
+                os.remove(args.socket)
+
+if __name__ == "__main__":
+    main()